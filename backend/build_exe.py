@@ -3,16 +3,45 @@ from __future__ import annotations
 
 import argparse
 import os
+import re
 import shutil
 import sys
+from importlib import metadata
 from pathlib import Path
-from typing import List, Optional
+from string import Template
+from typing import Iterable, List, Optional, Set
 
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 BACKEND_ROOT = PROJECT_ROOT / "backend"
 FRONTEND_ROOT = PROJECT_ROOT / "frontend"
 DEFAULT_DIST = BACKEND_ROOT / "dist"
 DEFAULT_BUILD = BACKEND_ROOT / "build"
+SPEC_TEMPLATE = BACKEND_ROOT / "LocalCursor.spec.in"
+REQUIREMENT_FILES = [BACKEND_ROOT / "requirements.txt", BACKEND_ROOT / "requirements-build.txt"]
+# Packaging tools that live in every virtualenv and are never bundled.
+ALWAYS_ALLOWED = {"pip", "setuptools", "wheel"}
+
+# Heavy packages PyInstaller tends to sweep in from a developer environment. The app only
+# needs fastapi, uvicorn and httpx, so none of these belong in the bundle.
+DEFAULT_EXCLUDES = [
+    "tkinter",
+    "matplotlib",
+    "numpy",
+    "pandas",
+    "scipy",
+    "PIL",
+    "PyQt5",
+    "PyQt6",
+    "PySide2",
+    "PySide6",
+    "botocore",
+    "boto3",
+    "notebook",
+    "IPython",
+    "sphinx",
+    "pytest",
+    "tests",
+]
 
 
 def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
@@ -43,6 +72,28 @@ def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
         action="store_true",
         help="Show the PyInstaller command without running it.",
     )
+    parser.add_argument(
+        "--extra-exclude",
+        action="append",
+        default=[],
+        metavar="MODULE",
+        help="Additional module to exclude from the bundle (repeatable).",
+    )
+    parser.add_argument(
+        "--no-default-excludes",
+        action="store_true",
+        help="Do not pass the built-in --exclude-module list to PyInstaller.",
+    )
+    parser.add_argument(
+        "--upx",
+        action="store_true",
+        help="Compress binaries with UPX (smaller files, slower start-up). Off by default.",
+    )
+    parser.add_argument(
+        "--allow-fat-env",
+        action="store_true",
+        help="Build even if the environment is not a virtualenv or has packages beyond the requirements.",
+    )
     parser.add_argument(
         "--check",
         action="store_true",
@@ -51,7 +102,7 @@ def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
     return parser.parse_args(argv)
 
 
-def ensure_pyinstaller() -> "module":
+def ensure_pyinstaller(allow_fat_env: bool = False, warn_only: bool = False) -> "module":
     try:
         import PyInstaller.__main__ as pyinstaller  # type: ignore
     except ImportError as exc:
@@ -60,17 +111,109 @@ def ensure_pyinstaller() -> "module":
             "or `pip install pyinstaller`."
         )
         raise SystemExit(message) from exc
+    _assert_minimal_env(allow_fat_env, warn_only)
     return pyinstaller
 
 
+def _normalize(name: str) -> str:
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def _allowed_distributions(requirement_files: Iterable[Path]) -> Set[str]:
+    """Return the requirement files' packages plus everything they depend on."""
+    from packaging.requirements import Requirement  # installed alongside PyInstaller
+
+    pending = []
+    for path in requirement_files:
+        for line in path.read_text(encoding="utf-8").splitlines():
+            line = line.split("#", 1)[0].strip()
+            if line:
+                pending.append(Requirement(line))
+
+    allowed: Set[str] = set(ALWAYS_ALLOWED)
+    seen: Set[str] = set()
+    while pending:
+        requirement = pending.pop()
+        name = _normalize(requirement.name)
+        allowed.add(name)
+        key = f"{name}[{','.join(sorted(requirement.extras))}]"
+        if key in seen:
+            continue
+        seen.add(key)
+        try:
+            requires = metadata.distribution(requirement.name).requires or []
+        except metadata.PackageNotFoundError:
+            continue
+        for spec in requires:
+            dependency = Requirement(spec)
+            marker = dependency.marker
+            if marker is None or any(marker.evaluate({"extra": extra}) for extra in requirement.extras or {""}):
+                pending.append(dependency)
+    return allowed
+
+
+def _assert_minimal_env(allow_fat_env: bool, warn_only: bool = False) -> None:
+    """Refuse to build from an environment PyInstaller would sweep extra packages out of."""
+    problems: List[str] = []
+    if sys.prefix == sys.base_prefix:
+        problems.append("The build is not running inside a virtualenv.")
+
+    allowed = _allowed_distributions(REQUIREMENT_FILES)
+    installed = {_normalize(dist.metadata["Name"]) for dist in metadata.distributions() if dist.metadata["Name"]}
+    extra = sorted(installed - allowed)
+    if extra:
+        problems.append("Packages not needed by the app are installed: " + ", ".join(extra))
+
+    if not problems:
+        return
+    for problem in problems:
+        print(f"warning: {problem}")
+    if allow_fat_env:
+        print("warning: continuing because --allow-fat-env was given; the executable may be larger than needed.")
+        return
+    if warn_only:
+        # --print-only never builds, so a fat environment is only worth reporting.
+        return
+    raise SystemExit(
+        "Build from a fresh virtualenv with only backend/requirements.txt and backend/requirements-build.txt "
+        "installed, or pass --allow-fat-env to build anyway."
+    )
+
+
 def clean_directories(*paths: Path) -> None:
     for path in paths:
         if path.exists():
             shutil.rmtree(path)
 
 
+def render_spec(args: argparse.Namespace) -> Path:
+    """Materialise the .spec file for this build, rewriting it only when it changes."""
+    datas = [(str(FRONTEND_ROOT.resolve()), "frontend")]
+    workspace_dir = PROJECT_ROOT / "workspace"
+    if workspace_dir.exists():
+        datas.append((str(workspace_dir.resolve()), "workspace"))
+
+    excludes = ([] if args.no_default_excludes else DEFAULT_EXCLUDES) + args.extra_exclude
+    spec = Template(SPEC_TEMPLATE.read_text(encoding="utf-8")).substitute(
+        script=repr(str(BACKEND_ROOT / "launcher.py")),
+        datas=repr(datas),
+        excludes=repr(excludes),
+        name=repr(args.name),
+        icon=repr(str(args.icon.resolve()) if args.icon else None),
+        onefile=repr(bool(args.onefile)),
+        upx=repr(bool(args.upx)),
+        # Stripping symbols is unsupported for Windows binaries.
+        strip=repr(os.name != "nt"),
+    )
+
+    spec_path = args.workpath.resolve() / f"{args.name}.spec"
+    if not spec_path.exists() or spec_path.read_text(encoding="utf-8") != spec:
+        spec_path.write_text(spec, encoding="utf-8")
+    return spec_path
+
+
 def build_executable(args: argparse.Namespace) -> None:
-    pyinstaller = ensure_pyinstaller()
+    pyinstaller = ensure_pyinstaller(allow_fat_env=args.allow_fat_env, warn_only=args.print_only)
 
     if args.clean:
         clean_directories(args.dist, args.workpath)
@@ -78,38 +221,25 @@ def build_executable(args: argparse.Namespace) -> None:
     args.dist.mkdir(parents=True, exist_ok=True)
     args.workpath.mkdir(parents=True, exist_ok=True)
 
-    add_data_sep = ";" if os.name == "nt" else ":"
-    frontend_data = f"{FRONTEND_ROOT.resolve()}{add_data_sep}frontend"
-
+    spec_path = render_spec(args)
     pyinstaller_args = [
-        str(BACKEND_ROOT / "launcher.py"),
+        str(spec_path),
         "--noconfirm",
-        "--name",
-        args.name,
         "--distpath",
         str(args.dist.resolve()),
         "--workpath",
         str(args.workpath.resolve()),
-        "--add-data",
-        frontend_data,
     ]
 
-    workspace_dir = PROJECT_ROOT / "workspace"
-    if workspace_dir.exists():
-        pyinstaller_args.extend(["--add-data", f"{workspace_dir.resolve()}{add_data_sep}workspace"])
-
-    if args.icon:
-        pyinstaller_args.extend(["--icon", str(args.icon.resolve())])
-
-    if args.onefile:
-        pyinstaller_args.append("--onefile")
-
     if args.print_only:
+        print(f"Spec file: {spec_path}")
         print("PyInstaller command:")
         print(" ".join(pyinstaller_args))
         return
 
     print("==> Building executable with PyInstaller…")
+    if not args.upx:
+        print("UPX compression is skipped for faster start-up (pass --upx to enable it).")
     pyinstaller.run(pyinstaller_args)
     print(f"Executable written to: {args.dist.resolve() / (args.name + ('.exe' if os.name == 'nt' else ''))}")
 
@@ -117,7 +247,7 @@ def build_executable(args: argparse.Namespace) -> None:
 def main(argv: Optional[List[str]] = None) -> None:
     args = parse_args(argv)
     if args.check:
-        ensure_pyinstaller()
+        ensure_pyinstaller(allow_fat_env=args.allow_fat_env)
         print("PyInstaller is available. Ready to build.")
         return
     build_executable(args)
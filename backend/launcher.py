@@ -6,6 +6,7 @@ from __future__ import annotations
 
 import argparse
 import os
+import socket
 import threading
 import time
 import webbrowser
@@ -17,9 +18,19 @@ DEFAULT_HOST = os.environ.get("UVICORN_HOST", "127.0.0.1")
 DEFAULT_PORT = int(os.environ.get("UVICORN_PORT", "8000"))
 
 
-def _open_browser(url: str, delay: float) -> None:
+def _open_browser(url: str, host: str, port: int, timeout: float = 10.0) -> None:
+    # Wildcard binds are reachable through loopback.
+    connect_host = {"0.0.0.0": "127.0.0.1", "::": "::1", "": "127.0.0.1"}.get(host, host)
+
     def _target() -> None:
-        time.sleep(delay)
+        # Open the page as soon as uvicorn accepts connections instead of guessing a delay.
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                with socket.create_connection((connect_host, port), timeout=0.05):
+                    break
+            except OSError:
+                time.sleep(0.02)
         try:
             webbrowser.open(url)
         except Exception:
@@ -39,6 +50,18 @@ def parse_args(args: Optional[list[str]] = None) -> argparse.Namespace:
         default=os.environ.get("UVICORN_LOG_LEVEL", "info"),
         help="Uvicorn log level (default: %(default)s)",
     )
+    parser.add_argument(
+        "--loop",
+        default=os.environ.get("UVICORN_LOOP", "auto"),
+        choices=["auto", "asyncio", "uvloop"],
+        help="Event loop implementation; auto picks uvloop when installed (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--http",
+        default=os.environ.get("UVICORN_HTTP", "auto"),
+        choices=["auto", "h11", "httptools"],
+        help="HTTP protocol implementation; auto picks httptools when installed (default: %(default)s)",
+    )
     parser.add_argument(
         "--reload",
         action="store_true",
@@ -65,7 +88,7 @@ def main(args: Optional[list[str]] = None) -> None:
     url = f"http://{parsed.host}:{parsed.port}"
 
     if parsed.open_browser and not parsed.reload:
-        _open_browser(url, delay=1.0)
+        _open_browser(url, parsed.host, parsed.port)
 
     uvicorn.run(
         "backend.main:app",
@@ -73,6 +96,8 @@ def main(args: Optional[list[str]] = None) -> None:
         port=parsed.port,
         reload=parsed.reload,
         log_level=parsed.log_level,
+        loop=parsed.loop,
+        http=parsed.http,
     )
 
 
@@ -1,20 +1,31 @@
 import asyncio
-import json
+import base64
+import io
+import mimetypes
+import mmap
 import os
+import posixpath
+import re
 import shutil
+import stat
 import subprocess
 import sys
-from datetime import datetime
+import threading
+import time
+from collections import OrderedDict
+from contextlib import aclosing, asynccontextmanager, suppress
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, AsyncGenerator, Dict, List, Optional
+from typing import Any, AsyncGenerator, Dict, Iterator, List, Optional, Set, Tuple
 
+import anyio
 import httpx
+import orjson
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import FileResponse, ORJSONResponse, StreamingResponse
 from starlette.responses import Response
-from sse_starlette.sse import EventSourceResponse
+from starlette.types import Message, Send
 
 BACKEND_ROOT = Path(__file__).resolve().parent
 APP_ROOT = BACKEND_ROOT.parent
@@ -25,7 +36,8 @@ FRONTEND_ROOT = RESOURCE_ROOT / "frontend"
 WORKSPACE_ROOT = EXEC_ROOT / "workspace"
 SETTINGS_PATH = (EXEC_ROOT / "settings.json") if IS_FROZEN else BACKEND_ROOT / "settings.json"
 HISTORY_DIR = (EXEC_ROOT / "data") if IS_FROZEN else BACKEND_ROOT / "data"
-HISTORY_PATH = HISTORY_DIR / "history.json"
+HISTORY_PATH = HISTORY_DIR / "history.jsonl"
+LEGACY_HISTORY_PATH = HISTORY_DIR / "history.json"
 
 DEFAULT_SETTINGS: Dict[str, Any] = {
     "backend": "ollama",
@@ -36,69 +48,266 @@ DEFAULT_SETTINGS: Dict[str, Any] = {
     "top_p": 0.9,
     "max_tokens": 2048,
 }
+# Only these keys can be changed through POST /settings.
+KNOWN_KEYS = tuple(DEFAULT_SETTINGS)
+# Settings key holding each backend's base URL; anything that is not Ollama speaks the LM Studio API.
+URL_KEY = {"ollama": "ollama_base_url", "lmstudio": "lmstudio_base_url"}
+
+
+def _normalize_settings(settings: Dict[str, Any]) -> Dict[str, Any]:
+    """Strip trailing slashes from base URLs so endpoints can be joined directly.
+
+    Used on stored settings and on request payloads that override a base URL.
+    """
+    for key in URL_KEY.values():
+        value = settings.get(key)
+        if isinstance(value, str):
+            settings[key] = value.rstrip("/")
+    return settings
+
+
+def _endpoint(base_url: str, path: str = "") -> str:
+    # *base_url* has been through _normalize_settings or _models_cache_key.
+    return base_url + path
+
 
 WORKSPACE_ROOT.mkdir(parents=True, exist_ok=True)
 HISTORY_DIR.mkdir(parents=True, exist_ok=True)
 
 
+_WRITE_CHUNK_SIZE = 1024 * 1024
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    """Replace *path* with *data* so readers never observe a partially written file."""
+    try:
+        mode = os.stat(path).st_mode & 0o7777
+    except FileNotFoundError:
+        mode = 0o644
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+    fd = os.open(tmp_path, flags, mode)
+    try:
+        try:
+            view = memoryview(data)
+            while view:
+                written = os.write(fd, view[:_WRITE_CHUNK_SIZE])
+                view = view[written:]
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
 def _ensure_settings() -> None:
     if not SETTINGS_PATH.exists():
         SETTINGS_PATH.parent.mkdir(parents=True, exist_ok=True)
-        with open(SETTINGS_PATH, "w", encoding="utf-8") as fh:
-            json.dump(DEFAULT_SETTINGS, fh, indent=2)
+        _atomic_write(SETTINGS_PATH, orjson.dumps(DEFAULT_SETTINGS, option=orjson.OPT_INDENT_2))
 
     if not HISTORY_PATH.exists():
         HISTORY_PATH.parent.mkdir(parents=True, exist_ok=True)
-        with open(HISTORY_PATH, "w", encoding="utf-8") as fh:
-            json.dump({"sessions": []}, fh, indent=2)
+        _migrate_legacy_history()
+
+
+def _migrate_legacy_history() -> None:
+    """Convert the old ``{"sessions": [...]}`` history.json into JSON Lines once."""
+    sessions: List[Any] = []
+    if LEGACY_HISTORY_PATH.exists():
+        try:
+            with open(LEGACY_HISTORY_PATH, "rb") as fh:
+                sessions = orjson.loads(fh.read()).get("sessions", [])
+        except (OSError, ValueError, AttributeError):
+            sessions = []
+    _atomic_write(HISTORY_PATH, b"".join(orjson.dumps(entry) + b"\n" for entry in sessions))
 
 
 _ensure_settings()
 
 
+# Parsed settings keyed by (st_mtime_ns, st_size) of settings.json; the size guards against
+# filesystems with coarse timestamps where an edit can keep the same mtime.
+_SETTINGS_CACHE: Optional[Tuple[Tuple[int, int], Dict[str, Any]]] = None
+_SETTINGS_LOCK = threading.Lock()
+
+
 def load_settings() -> Dict[str, Any]:
-    with open(SETTINGS_PATH, "r", encoding="utf-8") as fh:
-        settings = json.load(fh)
-    merged = DEFAULT_SETTINGS.copy()
-    merged.update(settings)
-    return merged
+    global _SETTINGS_CACHE
+    st = os.stat(SETTINGS_PATH)
+    validator = (st.st_mtime_ns, st.st_size)
+    cached = _SETTINGS_CACHE
+    if cached is None or cached[0] != validator:
+        with _SETTINGS_LOCK:
+            cached = _SETTINGS_CACHE
+            # Another thread may have reloaded while we waited for the lock.
+            if cached is None or cached[0] != validator:
+                with open(SETTINGS_PATH, "rb") as fh:
+                    settings = orjson.loads(fh.read())
+                merged = DEFAULT_SETTINGS.copy()
+                merged.update(settings)
+                cached = _SETTINGS_CACHE = (validator, _normalize_settings(merged))
+    # Hand out copies so callers can mutate without touching the cache.
+    return cached[1].copy()
 
 
 def save_settings(settings: Dict[str, Any]) -> None:
+    global _SETTINGS_CACHE
     merged = DEFAULT_SETTINGS.copy()
     merged.update(settings)
-    with open(SETTINGS_PATH, "w", encoding="utf-8") as fh:
-        json.dump(merged, fh, indent=2)
+    with _SETTINGS_LOCK:
+        _atomic_write(SETTINGS_PATH, orjson.dumps(merged, option=orjson.OPT_INDENT_2))
+        # Prime the cache with what we just wrote so the next load skips the reread.
+        st = os.stat(SETTINGS_PATH)
+        _SETTINGS_CACHE = ((st.st_mtime_ns, st.st_size), merged)
+
+
+def _utc_timestamp() -> str:
+    """ISO-8601 UTC timestamp with microseconds, e.g. ``2024-01-01T12:00:00.123456Z``."""
+    ns = time.time_ns()
+    seconds, remainder = divmod(ns, 1_000_000_000)
+    return f"{time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(seconds))}.{remainder // 1000:06d}Z"
+
+
+_HISTORY_LOCK = threading.Lock()
+# Upper bound on entries coalesced into one append + fsync by the background writer.
+HISTORY_BATCH_MAX = 256
+
+
+def _flush_history(entries: List[Dict[str, Any]]) -> None:
+    data = b"".join(orjson.dumps(entry) + b"\n" for entry in entries)
+    with _HISTORY_LOCK:
+        with open(HISTORY_PATH, "ab") as fh:
+            fh.write(data)
+            fh.flush()
+            os.fsync(fh.fileno())
 
 
 def append_history(entry: Dict[str, Any]) -> None:
     try:
-        with open(HISTORY_PATH, "r", encoding="utf-8") as fh:
-            history = json.load(fh)
-        history.setdefault("sessions", []).append(entry)
-        with open(HISTORY_PATH, "w", encoding="utf-8") as fh:
-            json.dump(history, fh, indent=2)
+        _flush_history([entry])
     except Exception:
         # history failures should never break chat
         pass
 
 
-class NoCacheStaticFiles(StaticFiles):
-    """StaticFiles variant that always revalidates assets."""
+async def _history_writer(queue: "asyncio.Queue[Dict[str, Any]]") -> None:
+    """Drain queued history entries, writing whatever has accumulated in one append + fsync."""
+    while True:
+        batch = [await queue.get()]
+        while len(batch) < HISTORY_BATCH_MAX:
+            try:
+                batch.append(queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        try:
+            await asyncio.to_thread(_flush_history, batch)
+        except Exception:
+            # history failures should never break chat
+            pass
+
+
+def _queue_history(entry: Dict[str, Any]) -> None:
+    queue: Optional["asyncio.Queue[Dict[str, Any]]"] = getattr(app.state, "history_queue", None)
+    if queue is None:
+        append_history(entry)
+    else:
+        queue.put_nowait(entry)
+
+
+def _iter_file_bytes(path: Path, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    with open(path, "rb") as fh:
+        while chunk := fh.read(chunk_size):
+            yield chunk
 
-    async def get_response(self, path: str, scope):  # type: ignore[override]
-        response: Response = await super().get_response(path, scope)
-        # Disable aggressive browser caching so UI changes show up on refresh.
-        response.headers["Cache-Control"] = "no-store, max-age=0"
-        response.headers["Pragma"] = "no-cache"
-        response.headers["Expires"] = "0"
-        return response
 
-    def is_not_modified(self, response_headers, request_headers) -> bool:  # type: ignore[override]
-        return False
+ASSETS_ROOT = FRONTEND_ROOT / "assets"
+_ASSETS_REAL = os.path.realpath(ASSETS_ROOT)
+# Disable aggressive browser caching so UI changes show up on refresh.
+NO_CACHE_HEADERS = {"Cache-Control": "no-store, max-age=0", "Pragma": "no-cache", "Expires": "0"}
+# Asset bytes are kept in memory and only re-read when the file's (mtime, size) changes.
+_ASSET_CACHE: Dict[str, Tuple[Tuple[int, int], bytes, str]] = {}
 
 
-app = FastAPI(title="Local Cursor")
+def _load_asset(path: str) -> Optional[Tuple[bytes, str]]:
+    normalized = posixpath.normpath(path)
+    if normalized in (".", "..") or normalized.startswith(("/", "../")) or "\\" in normalized or ":" in normalized:
+        return None
+    file_path = os.path.realpath(os.path.join(_ASSETS_REAL, normalized))
+    try:
+        inside = os.path.commonpath([_ASSETS_REAL, file_path]) == _ASSETS_REAL
+    except ValueError:
+        # Different drives on Windows.
+        inside = False
+    if not inside:
+        # A symlink inside the assets directory pointing outside of it.
+        return None
+    try:
+        st = os.stat(file_path)
+    except OSError:
+        return None
+    if not stat.S_ISREG(st.st_mode):
+        return None
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _ASSET_CACHE.get(normalized)
+    if cached is not None and cached[0] == stamp:
+        return cached[1], cached[2]
+    try:
+        with open(file_path, "rb") as fh:
+            content = fh.read()
+    except OSError:
+        return None
+    media_type = mimetypes.guess_type(normalized)[0] or "application/octet-stream"
+    _ASSET_CACHE[normalized] = (stamp, content, media_type)
+    return content, media_type
+
+
+def _preload_assets() -> None:
+    for root, _dirs, files in os.walk(_ASSETS_REAL):
+        relative_dir = os.path.relpath(root, _ASSETS_REAL).replace(os.sep, "/")
+        prefix = "" if relative_dir == "." else relative_dir + "/"
+        for name in files:
+            _load_asset(prefix + name)
+
+
+# Generous ceilings so many concurrent streams never queue behind the pool.
+HTTP_POOL_LIMITS = httpx.Limits(max_connections=1000, max_keepalive_connections=100)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
+    # One pooled client for the app lifetime keeps backend connections alive between calls.
+    app.state.http = httpx.AsyncClient(
+        timeout=httpx.Timeout(10.0, read=300.0),
+        http2=True,
+        limits=HTTP_POOL_LIMITS,
+    )
+    app.state.history_queue = asyncio.Queue()
+    await asyncio.to_thread(_preload_assets)
+    writer = asyncio.create_task(_history_writer(app.state.history_queue))
+    prewarm = asyncio.create_task(_prewarm_backend())
+    try:
+        yield
+    finally:
+        for task in (prewarm, writer):
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+        pending: List[Dict[str, Any]] = []
+        while not app.state.history_queue.empty():
+            pending.append(app.state.history_queue.get_nowait())
+        if pending:
+            # Flush whatever the writer did not get to before shutdown.
+            with suppress(Exception):
+                _flush_history(pending)
+        await app.state.http.aclose()
+
+
+app = FastAPI(title="Local Cursor", lifespan=lifespan, default_response_class=ORJSONResponse)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -107,11 +316,10 @@ app.add_middleware(
     allow_credentials=True,
 )
 
-app.mount(
-    "/assets",
-    NoCacheStaticFiles(directory=str(FRONTEND_ROOT / "assets")),
-    name="assets",
-)
+
+def _json_response(payload: Any) -> Response:
+    """Encode ``payload`` directly, skipping FastAPI's response-model validation pass."""
+    return Response(orjson.dumps(payload), media_type="application/json")
 
 
 @app.get("/")
@@ -119,10 +327,19 @@ async def index() -> FileResponse:
     return FileResponse(str(FRONTEND_ROOT / "index.html"))
 
 
+@app.api_route("/assets/{path:path}", methods=["GET", "HEAD"], name="assets")
+async def assets(path: str) -> Response:
+    asset = _load_asset(path)
+    if asset is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    content, media_type = asset
+    return Response(content, media_type=media_type, headers=NO_CACHE_HEADERS)
+
+
 @app.get("/health")
-async def health() -> Dict[str, Any]:
+async def health() -> Response:
     settings = load_settings()
-    return {"status": "ok", "settings": settings}
+    return _json_response({"status": "ok", "settings": settings})
 
 
 @app.get("/settings")
@@ -133,31 +350,54 @@ async def get_settings() -> Dict[str, Any]:
 @app.post("/settings")
 async def update_settings(payload: Dict[str, Any]) -> Dict[str, Any]:
     settings = load_settings()
-    settings.update({
-        "backend": payload.get("backend", settings["backend"]),
-        "ollama_base_url": payload.get("ollama_base_url", settings["ollama_base_url"]),
-        "lmstudio_base_url": payload.get("lmstudio_base_url", settings["lmstudio_base_url"]),
-        "model": payload.get("model", settings["model"]),
-        "temperature": payload.get("temperature", settings["temperature"]),
-        "top_p": payload.get("top_p", settings["top_p"]),
-        "max_tokens": payload.get("max_tokens", settings["max_tokens"]),
-    })
-    save_settings(settings)
+    settings.update({key: payload[key] for key in KNOWN_KEYS if key in payload})
+    save_settings(_normalize_settings(settings))
     return {"ok": True, "settings": settings}
 
 
+@app.get("/history")
+async def get_history() -> Response:
+    if not HISTORY_PATH.exists():
+        return Response(b"", media_type="application/x-ndjson")
+    return StreamingResponse(_iter_file_bytes(HISTORY_PATH), media_type="application/x-ndjson")
+
+
+# Model lists are cached per (backend, base URL) so /models can answer without a round trip;
+# ``?refresh=1`` skips the cache. The prewarm task re-fetches the configured backend's list
+# on its own, slower schedule.
+MODELS_CACHE_TTL = 5.0
+MODELS_PREWARM_INTERVAL = 30.0
+_MODELS_CACHE: Dict[Tuple[str, str], Tuple[float, List[str]]] = {}
+
+
 @app.get("/models")
-async def list_models(backend: Optional[str] = None, base_url: Optional[str] = None) -> Dict[str, Any]:
+async def list_models(
+    backend: Optional[str] = None, base_url: Optional[str] = None, refresh: bool = False
+) -> Response:
     settings = load_settings()
     backend_name = backend or settings["backend"]
     timeout = httpx.Timeout(5.0, read=20.0)
 
+    key = _models_cache_key(backend_name, base_url, settings)
+    cached = _MODELS_CACHE.get(key)
+    if not refresh and cached is not None and time.monotonic() - cached[0] < MODELS_CACHE_TTL:
+        return _json_response({"backend": backend_name, "models": cached[1]})
+
     try:
         models = await query_available_models(backend_name, base_url, settings, timeout)
     except Exception as exc:  # pragma: no cover - defensive, network issues vary
-        return {"backend": backend_name, "models": [], "error": str(exc)}
+        if cached is not None:
+            # Serve the last known list rather than an empty one while the backend is unreachable.
+            return _json_response({"backend": backend_name, "models": cached[1], "stale": True, "error": str(exc)})
+        return _json_response({"backend": backend_name, "models": [], "error": str(exc)})
 
-    return {"backend": backend_name, "models": models}
+    return _json_response({"backend": backend_name, "models": models})
+
+
+def _models_cache_key(backend_name: str, base_url: Optional[str], settings: Dict[str, Any]) -> Tuple[str, str]:
+    # Settings URLs are stored normalised; only an explicit override needs it here.
+    url = base_url.rstrip("/") if base_url else settings[URL_KEY.get(backend_name, "lmstudio_base_url")]
+    return backend_name, url
 
 
 async def query_available_models(
@@ -166,60 +406,75 @@ async def query_available_models(
     settings: Dict[str, Any],
     timeout: httpx.Timeout,
 ) -> List[str]:
-    url = base_url or (
-        settings["ollama_base_url"] if backend_name == "ollama" else settings["lmstudio_base_url"]
-    )
-    async with httpx.AsyncClient(timeout=timeout) as client:
-        if backend_name == "ollama":
-            response = await client.get(f"{url.rstrip('/')}/api/tags")
-            response.raise_for_status()
-            data = response.json()
-            return [item["name"] for item in data.get("models", []) if item.get("name")]
-        response = await client.get(f"{url.rstrip('/')}/v1/models")
+    key = _models_cache_key(backend_name, base_url, settings)
+    root = key[1]
+    client: httpx.AsyncClient = app.state.http
+    if backend_name == "ollama":
+        response = await client.get(_endpoint(root, "/api/tags"), timeout=timeout)
         response.raise_for_status()
-        data = response.json()
-        return [item["id"] for item in data.get("data", []) if item.get("id")]
+        data = orjson.loads(response.content)
+        models = [item["name"] for item in data.get("models", []) if item.get("name")]
+    else:
+        response = await client.get(_endpoint(root, "/v1/models"), timeout=timeout)
+        response.raise_for_status()
+        data = orjson.loads(response.content)
+        models = [item["id"] for item in data.get("data", []) if item.get("id")]
+    _MODELS_CACHE[key] = (time.monotonic(), models)
+    return models
+
+
+async def _prewarm_backend() -> None:
+    """Open a pooled connection to the configured backend and keep its model list fresh."""
+    timeout = httpx.Timeout(5.0, read=20.0)
+    while True:
+        try:
+            settings = load_settings()
+            await query_available_models(settings["backend"], None, settings, timeout)
+        except Exception:
+            # The backend may simply not be running yet.
+            pass
+        await asyncio.sleep(MODELS_PREWARM_INTERVAL)
+
+
+PROBE_TIMEOUT = httpx.Timeout(5.0)
 
 
 @app.post("/backend/test")
-async def test_backend(payload: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+async def test_backend(request: Request, payload: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     settings = load_settings()
     payload = payload or {}
     backend_name = payload.get("backend") or settings["backend"]
-    base_url = payload.get("base_url")
-    timeout = httpx.Timeout(5.0, read=20.0)
-    started = datetime.utcnow()
+    key = _models_cache_key(backend_name, payload.get("base_url"), settings)
+    root = key[1]
+    client: httpx.AsyncClient = request.app.state.http
 
+    # Any HTTP answer proves the server is up; the full model listing can be large.
+    started = time.perf_counter()
     try:
-        models = await query_available_models(backend_name, base_url, settings, timeout)
+        await client.head(_endpoint(root, "/"), timeout=PROBE_TIMEOUT)
     except Exception as exc:  # pragma: no cover - depends on local setup
-        return {
-            "ok": False,
-            "backend": backend_name,
-            "error": str(exc),
-            "base_url": base_url or (settings["ollama_base_url"] if backend_name == "ollama" else settings["lmstudio_base_url"]),
-        }
+        return {"ok": False, "backend": backend_name, "error": str(exc), "base_url": root}
+    duration = time.perf_counter() - started
 
-    duration = (datetime.utcnow() - started).total_seconds()
-    preview = models[:5]
-    return {
+    result: Dict[str, Any] = {
         "ok": True,
         "backend": backend_name,
-        "base_url": base_url or (settings["ollama_base_url"] if backend_name == "ollama" else settings["lmstudio_base_url"]),
-        "latency_seconds": duration,
-        "model_count": len(models),
-        "models_preview": preview,
+        "base_url": root,
+        "latency_seconds": round(duration, 6),
     }
-
-
-def _flatten_messages(messages: List[Dict[str, Any]]) -> str:
-    parts: List[str] = []
-    for message in messages:
-        role = message.get("role", "user").upper()
-        content = message.get("content", "")
-        parts.append(f"{role}: {content}")
-    parts.append("ASSISTANT:")
-    return "\n".join(parts)
+    cached = _MODELS_CACHE.get(key)
+    models: Optional[List[str]] = None
+    if cached is not None and time.monotonic() - cached[0] < MODELS_CACHE_TTL:
+        models = cached[1]
+    elif payload.get("include_models"):
+        try:
+            models = await query_available_models(backend_name, root, settings, httpx.Timeout(5.0, read=20.0))
+        except Exception as exc:  # pragma: no cover - depends on local setup
+            result["models_error"] = str(exc)
+    if models is not None:
+        result["model_count"] = len(models)
+        result["models_preview"] = models[:5]
+    return result
 
 
 def _compute_ollama_options(temperature: float, top_p: float, max_tokens: int) -> Dict[str, Any]:
@@ -236,137 +491,325 @@ def _compute_ollama_options(temperature: float, top_p: float, max_tokens: int) -
     return options
 
 
+STREAM_TIMEOUT = httpx.Timeout(5.0, read=300.0)
+
+
+_SSE_EVENT_PREFIXES: Dict[str, bytes] = {}
+
+
+def _sse(event: str, data: str) -> bytes:
+    """Encode one server-sent event; multi-line data becomes one ``data:`` line per line."""
+    prefix = _SSE_EVENT_PREFIXES.get(event)
+    if prefix is None:
+        prefix = _SSE_EVENT_PREFIXES[event] = f"event: {event}\n".encode()
+    if "\n" in data or "\r" in data:
+        lines = data.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+        return prefix + "".join(f"data: {line}\n" for line in lines).encode() + b"\n"
+    return prefix + b"data: " + data.encode() + b"\n\n"
+
+
+def _status_event(stage: str, **extra: Any) -> bytes:
+    return _sse("status", orjson.dumps({"stage": stage, **extra}).decode())
+
+
+# Events with fixed payloads are encoded once and reused for every stream.
+STATUS_CONNECTING = _status_event("connecting")
+STATUS_CONNECTED = _status_event("connected")
+STATUS_STREAMING = _status_event("streaming")
+STATUS_COMPLETED = _status_event("completed")
+END_EVENT = _sse("end", "")
+SSE_PING = b": ping\n\n"
+SSE_PING_INTERVAL = 20.0
+
+_SSE_DATA_PREFIX = b"data:"
+_SSE_DATA_PREFIX_LEN = len(_SSE_DATA_PREFIX)
+_SSE_DONE = b"[DONE]"
+_JSON_CLOSERS = (b"}", b"]")
+
+
+async def _aiter_byte_lines(response: httpx.Response) -> AsyncGenerator[bytes, None]:
+    """Yield newline-delimited frames from a streamed response without decoding them."""
+    pending = b""
+    # Raw chunks skip httpx's decoder chain; compressed or already-read bodies need aiter_bytes().
+    # No chunk_size here: httpx would hold data back until a full chunk arrived.
+    if response.is_stream_consumed or response.headers.get("content-encoding"):
+        chunks = response.aiter_bytes()
+    else:
+        chunks = response.aiter_raw()
+    async for chunk in chunks:
+        if pending:
+            chunk = pending + chunk
+        *lines, pending = chunk.split(b"\n")
+        for line in lines:
+            yield line
+    if pending:
+        yield pending
+
+
+class _DeltaBatcher:
+    """Coalesce streamed tokens into one ``delta`` event per ~16 ms window.
+
+    Every yielded event goes through SSE framing and a socket write; at 100+ tokens/s that
+    cost dominates, while the UI cannot show more than one update per frame anyway. Held
+    tokens are flushed when the window runs out even if no further frame arrives (see
+    ``_batched_lines``).
+    """
+
+    __slots__ = ("_pending", "_last", "_clock")
+
+    WINDOW = 0.016
+    MAX_TOKENS = 8
+
+    def __init__(self) -> None:
+        self._clock = asyncio.get_running_loop().time
+        self._pending: List[str] = []
+        # Start one window in the past so the first token goes out immediately.
+        self._last = self._clock() - self.WINDOW
+
+    def add(self, token: str) -> Optional[bytes]:
+        self._pending.append(token)
+        now = self._clock()
+        if len(self._pending) >= self.MAX_TOKENS or now - self._last >= self.WINDOW:
+            return self.flush(now)
+        return None
+
+    def time_left(self) -> Optional[float]:
+        """Seconds until the held tokens are due, or ``None`` when nothing is held."""
+        if not self._pending:
+            return None
+        return max(0.0, self.WINDOW - (self._clock() - self._last))
+
+    def flush(self, now: Optional[float] = None) -> Optional[bytes]:
+        if not self._pending:
+            return None
+        self._last = self._clock() if now is None else now
+        event = _sse("delta", "".join(self._pending))
+        self._pending.clear()
+        return event
+
+
+# Queued by _pump_lines once the upstream body is exhausted.
+_STREAM_EOF = object()
+
+
+async def _pump_lines(response: httpx.Response, queue: "asyncio.Queue[Any]") -> None:
+    try:
+        async for line in _aiter_byte_lines(response):
+            queue.put_nowait(line)
+    except Exception as exc:
+        queue.put_nowait(exc)
+    else:
+        queue.put_nowait(_STREAM_EOF)
+
+
+async def _batched_lines(
+    response: httpx.Response, batcher: _DeltaBatcher
+) -> AsyncGenerator[Optional[bytes], None]:
+    """Yield upstream frames, or ``None`` when *batcher*'s window ends before the next frame.
+
+    One reader task feeds a queue for the whole response. While tokens are held, a single
+    timer drops ``None`` into the same queue when their window runs out, so frames themselves
+    never wait on a timeout.
+    """
+    loop = asyncio.get_running_loop()
+    queue: "asyncio.Queue[Any]" = asyncio.Queue()
+    reader = loop.create_task(_pump_lines(response, queue))
+    timer: Optional[asyncio.TimerHandle] = None
+    try:
+        while True:
+            delay = batcher.time_left()
+            if delay is None:
+                if timer is not None:
+                    timer.cancel()
+                    timer = None
+            elif timer is None:
+                timer = loop.call_later(delay, queue.put_nowait, None)
+            item = await queue.get()
+            if item is None:
+                timer = None
+            elif item is _STREAM_EOF:
+                return
+            elif isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        if timer is not None:
+            timer.cancel()
+        # The reader has to stop before the response is closed. A client disconnect cancels
+        # this task over and over, so shield the wait or the read's own cleanup gets cut short.
+        with anyio.CancelScope(shield=True):
+            reader.cancel()
+            await asyncio.wait((reader,))
+
+
+def _fast_json_string(chunk: bytes, needle: bytes) -> Optional[str]:
+    """Pull one string field (``needle`` is its ``"key":"`` prefix) straight out of a frame.
+
+    Returns ``None`` whenever the frame is not the plain shape (escapes, the key appearing
+    twice, odd spacing), so the caller can fall back to a full JSON parse.
+    """
+    start = chunk.find(needle)
+    if start == -1:
+        return None
+    start += len(needle)
+    end = chunk.find(b'"', start)
+    if end == -1 or chunk.find(b"\\", start, end) != -1 or chunk.find(needle, end) != -1:
+        return None
+    try:
+        return chunk[start:end].decode("utf-8")
+    except UnicodeDecodeError:
+        return None
+
+
+# Both backends put the token text in a "content" string (message / delta objects).
+_CONTENT_FIELD = b'"content":"'
+# Ollama's final frame carries only timing stats when its message content is empty.
+_OLLAMA_DONE = b'"done":true'
+_OLLAMA_NOT_DONE = b'"done":false'
+_OLLAMA_EMPTY_CONTENT = b'"content":""'
+
+
 async def _stream_ollama(
     client: httpx.AsyncClient,
-    url: str,
+    endpoint: str,
     payload: Dict[str, Any],
-    request: Request,
-) -> AsyncGenerator[Dict[str, str], None]:
-    yield {"event": "status", "data": json.dumps({"stage": "connecting"})}
-    async with client.stream("POST", f"{url.rstrip('/')}/api/generate", json=payload) as response:
+) -> AsyncGenerator[bytes, None]:
+    yield STATUS_CONNECTING
+    async with client.stream("POST", endpoint, json=payload, timeout=STREAM_TIMEOUT) as response:
         response.raise_for_status()
-        yield {"event": "status", "data": json.dumps({"stage": "connected"})}
+        yield STATUS_CONNECTED
         first_token = True
-        async for line in response.aiter_lines():
-            if await request.is_disconnected():
-                break
-            if not line:
-                continue
-            try:
-                data = json.loads(line)
-            except json.JSONDecodeError:
-                continue
-            token = data.get("response")
-            if token:
-                if first_token:
-                    first_token = False
-                    yield {"event": "status", "data": json.dumps({"stage": "streaming"})}
-                yield {"event": "delta", "data": token}
-            if data.get("done"):
-                break
-    yield {"event": "status", "data": json.dumps({"stage": "completed"})}
+        batcher = _DeltaBatcher()
+        async with aclosing(_batched_lines(response, batcher)) as lines:
+            async for line in lines:
+                if line is None:
+                    event = batcher.flush()
+                    if event is not None:
+                        yield event
+                    continue
+                if not line.strip():
+                    continue
+                if _OLLAMA_DONE in line and _OLLAMA_EMPTY_CONTENT in line:
+                    break
+                # Mid-stream frames only need their message content; skip building the whole dict.
+                token = _fast_json_string(line, _CONTENT_FIELD) if _OLLAMA_NOT_DONE in line else None
+                done = False
+                if token is None:
+                    try:
+                        data = orjson.loads(line)
+                    except orjson.JSONDecodeError:
+                        continue
+                    message = data.get("message")
+                    token = message.get("content") if message else None
+                    done = bool(data.get("done"))
+                if token:
+                    if first_token:
+                        first_token = False
+                        yield STATUS_STREAMING
+                    event = batcher.add(token)
+                    if event is not None:
+                        yield event
+                if done:
+                    break
+        event = batcher.flush()
+        if event is not None:
+            yield event
+    yield STATUS_COMPLETED
 
 
 async def _stream_lmstudio(
     client: httpx.AsyncClient,
-    url: str,
+    endpoint: str,
     payload: Dict[str, Any],
-    request: Request,
-) -> AsyncGenerator[Dict[str, str], None]:
-    yield {"event": "status", "data": json.dumps({"stage": "connecting"})}
-    async with client.stream("POST", f"{url.rstrip('/')}/v1/chat/completions", json=payload) as response:
+) -> AsyncGenerator[bytes, None]:
+    yield STATUS_CONNECTING
+    async with client.stream("POST", endpoint, json=payload, timeout=STREAM_TIMEOUT) as response:
         response.raise_for_status()
-        yield {"event": "status", "data": json.dumps({"stage": "connected"})}
+        yield STATUS_CONNECTED
         first_token = True
-        async for raw_line in response.aiter_lines():
-            if await request.is_disconnected():
-                break
-            if not raw_line:
-                continue
-            if not raw_line.startswith("data:"):
-                continue
-            chunk = raw_line[len("data:") :].strip()
-            if chunk == "[DONE]":
-                break
-            try:
-                data = json.loads(chunk)
-            except json.JSONDecodeError:
-                continue
-            delta = data.get("choices", [{}])[0].get("delta", {}).get("content")
-            if delta:
-                if first_token:
-                    first_token = False
-                    yield {"event": "status", "data": json.dumps({"stage": "streaming"})}
-                yield {"event": "delta", "data": delta}
-    yield {"event": "status", "data": json.dumps({"stage": "completed"})}
+        batcher = _DeltaBatcher()
+        async with aclosing(_batched_lines(response, batcher)) as lines:
+            async for line in lines:
+                if line is None:
+                    event = batcher.flush()
+                    if event is not None:
+                        yield event
+                    continue
+                if not line.startswith(_SSE_DATA_PREFIX):
+                    continue
+                chunk = line[_SSE_DATA_PREFIX_LEN:].strip()
+                if chunk == _SSE_DONE:
+                    break
+                delta = _fast_json_string(chunk, _CONTENT_FIELD)
+                if delta is None:
+                    # A complete JSON payload ends with "}" or "]"; anything else would only fail to parse.
+                    if chunk[-1:] not in _JSON_CLOSERS:
+                        continue
+                    try:
+                        data = orjson.loads(chunk)
+                    except orjson.JSONDecodeError:
+                        continue
+                    choices = data.get("choices")
+                    if not choices:
+                        continue
+                    delta_obj = choices[0].get("delta")
+                    delta = delta_obj.get("content") if delta_obj else None
+                if delta:
+                    if first_token:
+                        first_token = False
+                        yield STATUS_STREAMING
+                    event = batcher.add(delta)
+                    if event is not None:
+                        yield event
+        event = batcher.flush()
+        if event is not None:
+            yield event
+    yield STATUS_COMPLETED
 
 
-@app.post("/chat_stream")
-async def chat_stream(request: Request) -> EventSourceResponse:
-    payload = await request.json()
-    settings = load_settings()
-    backend_name = payload.get("backend") or settings["backend"]
-    model = payload.get("model") or settings["model"]
-    temperature = payload.get("temperature", settings["temperature"])
-    top_p = payload.get("top_p", settings["top_p"])
-    max_tokens = payload.get("max_tokens", settings["max_tokens"])
-    messages = payload.get("messages", [])
+class _EventStreamResponse(StreamingResponse):
+    """StreamingResponse for pre-encoded SSE bytes that also sends a keepalive comment.
 
-    if not model:
-        raise HTTPException(400, "Model is required")
+    One ping task runs next to the body for the whole response and shares ``send`` under a
+    lock, so individual events pay nothing for the keepalive.
+    """
 
-    async def event_generator() -> AsyncGenerator[Dict[str, str], None]:
-        timeout = httpx.Timeout(5.0, read=300.0)
-        async with httpx.AsyncClient(timeout=timeout) as client:
-            if backend_name == "ollama":
-                base_url = payload.get("ollama_base_url") or settings["ollama_base_url"]
-                req = {
-                    "model": model,
-                    "prompt": _flatten_messages(messages),
-                    "stream": True,
-                    "options": _compute_ollama_options(temperature, top_p, max_tokens),
-                }
-                try:
-                    async for event in _stream_ollama(client, base_url, req, request):
-                        yield event
-                except Exception as exc:
-                    yield {"event": "status", "data": json.dumps({"stage": "error", "message": str(exc)})}
-                    yield {"event": "error", "data": str(exc)}
-            else:
-                base_url = payload.get("lmstudio_base_url") or settings["lmstudio_base_url"]
-                req = {
-                    "model": model,
-                    "messages": messages,
-                    "stream": True,
-                    "temperature": temperature,
-                    "top_p": top_p,
-                    "max_tokens": max_tokens,
-                }
-                try:
-                    async for event in _stream_lmstudio(client, base_url, req, request):
-                        yield event
-                except Exception as exc:
-                    yield {"event": "status", "data": json.dumps({"stage": "error", "message": str(exc)})}
-                    yield {"event": "error", "data": str(exc)}
-        yield {"event": "end", "data": ""}
-
-    asyncio.create_task(
-        asyncio.to_thread(
-            append_history,
-            {
-                "timestamp": datetime.utcnow().isoformat() + "Z",
-                "backend": backend_name,
-                "model": model,
-                "messages": messages,
-            },
-        )
-    )
+    media_type = "text/event-stream"
 
-    return EventSourceResponse(event_generator())
+    def __init__(
+        self,
+        content: AsyncGenerator[bytes, None],
+        ping_interval: float = SSE_PING_INTERVAL,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        super().__init__(content, headers=headers)
+        self.ping_interval = ping_interval
 
+    async def stream_response(self, send: Send) -> None:
+        lock = anyio.Lock()
 
-@app.post("/chat_once")
-async def chat_once(payload: Dict[str, Any]) -> Dict[str, Any]:
+        async def locked_send(message: Message) -> None:
+            async with lock:
+                await send(message)
+
+        async def ping() -> None:
+            while True:
+                await anyio.sleep(self.ping_interval)
+                await locked_send({"type": "http.response.body", "body": SSE_PING, "more_body": True})
+
+        async with anyio.create_task_group() as task_group:
+            task_group.start_soon(ping)
+            await super().stream_response(locked_send)
+            task_group.cancel_scope.cancel()
+
+
+@app.post("/chat_stream")
+async def chat_stream(request: Request) -> _EventStreamResponse:
+    try:
+        payload = orjson.loads(await request.body())
+    except orjson.JSONDecodeError as exc:
+        raise HTTPException(400, "Invalid JSON body") from exc
+    _normalize_settings(payload)
     settings = load_settings()
     backend_name = payload.get("backend") or settings["backend"]
     model = payload.get("model") or settings["model"]
@@ -378,38 +821,106 @@ async def chat_once(payload: Dict[str, Any]) -> Dict[str, Any]:
     if not model:
         raise HTTPException(400, "Model is required")
 
-    timeout = httpx.Timeout(10.0, read=300.0)
-    async with httpx.AsyncClient(timeout=timeout) as client:
+    async def event_generator() -> AsyncGenerator[bytes, None]:
+        client: httpx.AsyncClient = request.app.state.http
         if backend_name == "ollama":
             base_url = payload.get("ollama_base_url") or settings["ollama_base_url"]
+            endpoint = _endpoint(base_url, "/api/chat")
             req = {
                 "model": model,
-                "prompt": _flatten_messages(messages),
-                "stream": False,
+                "messages": messages,
+                "stream": True,
                 "options": _compute_ollama_options(temperature, top_p, max_tokens),
             }
-            response = await client.post(f"{base_url.rstrip('/')}/api/generate", json=req)
-            response.raise_for_status()
-            data = response.json()
-            text = data.get("response", "")
+            try:
+                async for event in _stream_ollama(client, endpoint, req):
+                    yield event
+            except Exception as exc:
+                yield _status_event("error", message=str(exc))
+                yield _sse("error", str(exc))
         else:
             base_url = payload.get("lmstudio_base_url") or settings["lmstudio_base_url"]
+            endpoint = _endpoint(base_url, "/v1/chat/completions")
             req = {
                 "model": model,
                 "messages": messages,
-                "stream": False,
+                "stream": True,
                 "temperature": temperature,
                 "top_p": top_p,
                 "max_tokens": max_tokens,
             }
-            response = await client.post(f"{base_url.rstrip('/')}/v1/chat/completions", json=req)
-            response.raise_for_status()
-            data = response.json()
-            text = data.get("choices", [{}])[0].get("message", {}).get("content", "")
+            try:
+                async for event in _stream_lmstudio(client, endpoint, req):
+                    yield event
+            except Exception as exc:
+                yield _status_event("error", message=str(exc))
+                yield _sse("error", str(exc))
+        yield END_EVENT
+
+    _queue_history(
+        {
+            "timestamp": _utc_timestamp(),
+            "backend": backend_name,
+            "model": model,
+            "messages": messages,
+        }
+    )
+
+    # Events are framed as bytes up front. StreamingResponse listens for the client disconnect
+    # in its own task and cancels this generator (closing the upstream stream with it), so
+    # the loops never poll for it.
+    return _EventStreamResponse(
+        event_generator(),
+        headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"},
+    )
+
 
-    append_history(
+@app.post("/chat_once")
+async def chat_once(request: Request, payload: Dict[str, Any]) -> Dict[str, Any]:
+    _normalize_settings(payload)
+    settings = load_settings()
+    backend_name = payload.get("backend") or settings["backend"]
+    model = payload.get("model") or settings["model"]
+    temperature = payload.get("temperature", settings["temperature"])
+    top_p = payload.get("top_p", settings["top_p"])
+    max_tokens = payload.get("max_tokens", settings["max_tokens"])
+    messages = payload.get("messages", [])
+
+    if not model:
+        raise HTTPException(400, "Model is required")
+
+    timeout = httpx.Timeout(10.0, read=300.0)
+    client: httpx.AsyncClient = request.app.state.http
+    if backend_name == "ollama":
+        base_url = payload.get("ollama_base_url") or settings["ollama_base_url"]
+        req = {
+            "model": model,
+            "messages": messages,
+            "stream": False,
+            "options": _compute_ollama_options(temperature, top_p, max_tokens),
+        }
+        response = await client.post(_endpoint(base_url, "/api/chat"), json=req, timeout=timeout)
+        response.raise_for_status()
+        data = orjson.loads(response.content)
+        text = (data.get("message") or {}).get("content", "")
+    else:
+        base_url = payload.get("lmstudio_base_url") or settings["lmstudio_base_url"]
+        req = {
+            "model": model,
+            "messages": messages,
+            "stream": False,
+            "temperature": temperature,
+            "top_p": top_p,
+            "max_tokens": max_tokens,
+        }
+        response = await client.post(_endpoint(base_url, "/v1/chat/completions"), json=req, timeout=timeout)
+        response.raise_for_status()
+        data = orjson.loads(response.content)
+        text = data.get("choices", [{}])[0].get("message", {}).get("content", "")
+
+    _queue_history(
         {
-            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "timestamp": _utc_timestamp(),
             "backend": backend_name,
             "model": model,
             "messages": messages,
@@ -424,43 +935,144 @@ async def chat_once(payload: Dict[str, Any]) -> Dict[str, Any]:
 # Workspace file endpoints
 # -----------------------
 
-def _safe_join(base: Path, path: str) -> Path:
-    target = (base / (path or "")).resolve()
-    try:
-        target.relative_to(base.resolve())
-    except ValueError as exc:
-        raise HTTPException(status_code=400, detail="Invalid path") from exc
-    return target
+_WORKSPACE_REAL = os.path.realpath(WORKSPACE_ROOT)
 
 
-@app.get("/fs/list")
-async def fs_list(path: str = "") -> Dict[str, Any]:
-    target = _safe_join(WORKSPACE_ROOT, path)
-    if not target.exists():
-        return {"path": path, "items": []}
+def _safe_join(base: Path, path: str) -> Path:
+    base_real = _WORKSPACE_REAL if base == WORKSPACE_ROOT else os.path.realpath(base)
+    # Cheap lexical screening first: most calls target the root or a plain relative path.
+    cleaned = posixpath.normpath((path or "").replace("\\", "/"))
+    if cleaned == ".":
+        return Path(base_real)
+    if cleaned.startswith("/") or cleaned == ".." or cleaned.startswith("../") or os.path.splitdrive(cleaned)[0]:
+        raise HTTPException(status_code=400, detail="Invalid path")
+    # Still resolve symlinks so a link inside the workspace cannot point outside it.
+    target = os.path.realpath(os.path.join(base_real, cleaned))
+    try:
+        inside = os.path.commonpath([base_real, target]) == base_real
+    except ValueError:
+        # Different drives on Windows.
+        inside = False
+    if not inside:
+        raise HTTPException(status_code=400, detail="Invalid path")
+    return Path(target)
+
+
+# Directory listings are cached against the directory's mtime; search results for a short TTL
+# and served stale while a background refresh runs. Both are dropped on workspace mutations.
+_FS_CACHE_MAX_ENTRIES = 128
+SEARCH_CACHE_TTL = 2.0
+_LIST_CACHE: "OrderedDict[str, Tuple[int, List[Dict[str, Any]]]]" = OrderedDict()
+_SEARCH_CACHE: "OrderedDict[Tuple[str, str, Optional[int]], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+_SEARCH_REFRESHING: Set[Tuple[str, str, Optional[int]]] = set()
+# Bumped on every invalidation so a search that was already running cannot store stale results.
+_SEARCH_GENERATION = 0
+_FS_CACHE_LOCK = threading.Lock()
+
+
+def _cache_get(cache: OrderedDict, key: Any) -> Any:
+    with _FS_CACHE_LOCK:
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+        return value
+
+
+def _cache_store(cache: OrderedDict, key: Any, value: Any) -> None:
+    # Caller holds _FS_CACHE_LOCK.
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > _FS_CACHE_MAX_ENTRIES:
+        cache.popitem(last=False)
+
+
+def _cache_put(cache: OrderedDict, key: Any, value: Any) -> None:
+    with _FS_CACHE_LOCK:
+        _cache_store(cache, key, value)
+
+
+def _invalidate_fs_caches(*targets: Path) -> None:
+    """Forget cached listings of *targets*, their parents and anything below them, plus all searches."""
+    global _SEARCH_GENERATION
+    with _FS_CACHE_LOCK:
+        _SEARCH_GENERATION += 1
+        for target in targets:
+            parent, root = str(target.parent), str(target)
+            for key in list(_LIST_CACHE):
+                if key in (parent, root) or key.startswith(root + os.sep):
+                    del _LIST_CACHE[key]
+        _SEARCH_CACHE.clear()
+
+
+def _store_search(key: Tuple[str, str, Optional[int]], generation: int, result: Dict[str, Any]) -> None:
+    with _FS_CACHE_LOCK:
+        if generation != _SEARCH_GENERATION:
+            # The workspace changed while this search ran.
+            return
+        _cache_store(_SEARCH_CACHE, key, (time.monotonic(), result))
+
+
+def _list_dir(target: Path) -> List[Dict[str, Any]]:
+    # scandir hands back the type info from the directory read itself, so only the size costs a stat.
+    with os.scandir(target) as it:
+        entries = sorted(it, key=lambda entry: entry.name)
+    relative_dir = os.path.relpath(target, _WORKSPACE_REAL).replace(os.sep, "/")
+    prefix = "" if relative_dir == "." else relative_dir + "/"
     items: List[Dict[str, Any]] = []
-    for name in sorted(p.name for p in target.iterdir()):
-        full_path = target / name
+    for entry in entries:
+        is_file = entry.is_file()
         items.append(
             {
-                "name": name,
-                "path": full_path.relative_to(WORKSPACE_ROOT).as_posix(),
-                "is_dir": full_path.is_dir(),
-                "size": full_path.stat().st_size if full_path.is_file() else 0,
+                "name": entry.name,
+                "path": prefix + entry.name,
+                "is_dir": entry.is_dir(),
+                "size": entry.stat().st_size if is_file else 0,
             }
         )
-    return {"path": path, "items": items}
+    return items
+
+
+@app.get("/fs/list")
+async def fs_list(path: str = "") -> Response:
+    target = _safe_join(WORKSPACE_ROOT, path)
+    try:
+        mtime = os.stat(target).st_mtime_ns
+    except FileNotFoundError:
+        return _json_response({"path": path, "items": []})
+    key = str(target)
+    cached = _cache_get(_LIST_CACHE, key)
+    if cached is not None and cached[0] == mtime:
+        return _json_response({"path": path, "items": cached[1]})
+    items = await asyncio.to_thread(_list_dir, target)
+    _cache_put(_LIST_CACHE, key, (mtime, items))
+    return _json_response({"path": path, "items": items})
+
+
+# Files above this size are sent as plain text instead of being embedded in JSON.
+STREAM_READ_THRESHOLD = 256 * 1024
+
+
+def _read_text(target: Path) -> str:
+    return target.read_bytes().decode("utf-8", errors="ignore")
+
+
+def _write_text(target: Path, content: str) -> None:
+    target.parent.mkdir(parents=True, exist_ok=True)
+    _atomic_write(target, content.encode("utf-8"))
 
 
 @app.get("/fs/read")
-async def fs_read(path: str) -> Dict[str, Any]:
+async def fs_read(path: str) -> Any:
     if not path:
         raise HTTPException(400, "Path is required")
     target = _safe_join(WORKSPACE_ROOT, path)
     if not target.exists() or not target.is_file():
         raise HTTPException(404, "File not found")
-    with target.open("r", encoding="utf-8", errors="ignore") as fh:
-        content = fh.read()
+    stat_result = target.stat()
+    if stat_result.st_size > STREAM_READ_THRESHOLD:
+        # FileResponse can hand the file to the OS (sendfile) instead of copying it through Python.
+        return FileResponse(target, media_type="text/plain; charset=utf-8", stat_result=stat_result)
+    content = await asyncio.to_thread(_read_text, target)
     return {"path": path, "content": content}
 
 
@@ -471,12 +1083,25 @@ async def fs_write(payload: Dict[str, Any]) -> Dict[str, Any]:
     if not path:
         raise HTTPException(400, "Path is required")
     target = _safe_join(WORKSPACE_ROOT, path)
-    target.parent.mkdir(parents=True, exist_ok=True)
-    with target.open("w", encoding="utf-8") as fh:
-        fh.write(content)
+    await asyncio.to_thread(_write_text, target, content)
+    _invalidate_fs_caches(target)
     return {"ok": True}
 
 
+def _create_path(target: Path, is_dir: bool) -> None:
+    if is_dir:
+        target.mkdir(parents=True, exist_ok=True)
+    else:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with target.open("w", encoding="utf-8") as fh:
+            fh.write("")
+
+
+def _move_path(source: Path, dest: Path) -> None:
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    source.replace(dest)
+
+
 @app.post("/fs/new")
 async def fs_new(payload: Dict[str, Any]) -> Dict[str, Any]:
     path = payload.get("path")
@@ -484,12 +1109,8 @@ async def fs_new(payload: Dict[str, Any]) -> Dict[str, Any]:
     if not path:
         raise HTTPException(400, "Path is required")
     target = _safe_join(WORKSPACE_ROOT, path)
-    if is_dir:
-        target.mkdir(parents=True, exist_ok=True)
-    else:
-        target.parent.mkdir(parents=True, exist_ok=True)
-        with target.open("w", encoding="utf-8") as fh:
-            fh.write("")
+    await asyncio.to_thread(_create_path, target, is_dir)
+    _invalidate_fs_caches(target)
     return {"ok": True}
 
 
@@ -501,28 +1122,300 @@ async def fs_rename(payload: Dict[str, Any]) -> Dict[str, Any]:
         raise HTTPException(400, "src and dst are required")
     source = _safe_join(WORKSPACE_ROOT, src)
     dest = _safe_join(WORKSPACE_ROOT, dst)
-    dest.parent.mkdir(parents=True, exist_ok=True)
-    source.replace(dest)
+    await asyncio.to_thread(_move_path, source, dest)
+    _invalidate_fs_caches(source, dest)
     return {"ok": True}
 
 
+def _delete_path(target: Path) -> None:
+    if target.is_dir():
+        # Where supported, rmtree works relative to open directory fds, which saves a full
+        # path lookup per entry and is safe against symlink swaps mid-delete.
+        shutil.rmtree(target)
+    elif target.exists():
+        target.unlink()
+
+
 @app.post("/fs/delete")
 async def fs_delete(payload: Dict[str, Any]) -> Dict[str, Any]:
     path = payload.get("path")
     if not path:
         raise HTTPException(400, "Path is required")
     target = _safe_join(WORKSPACE_ROOT, path)
-    if target.is_dir():
-        shutil.rmtree(target)
-    elif target.exists():
-        target.unlink()
+    await asyncio.to_thread(_delete_path, target)
+    _invalidate_fs_caches(target)
     return {"ok": True}
 
 
+_BINARY_SNIFF_BYTES = 8192
+
+
+@lru_cache(maxsize=32)
+def _query_pattern(query: str) -> "re.Pattern[bytes]":
+    # Compiled once per query rather than once per scanned file; typing repeats queries too.
+    return re.compile(re.escape(query.encode("ascii")), re.IGNORECASE)
+
+
+def _search_file(file_path: str, query: str) -> List[Tuple[int, str]]:
+    """Return ``(line_number, stripped_line)`` for each line of *file_path* containing *query*.
+
+    *query* must already be lower-cased. ASCII queries are matched case-insensitively
+    against the memory-mapped bytes; other queries fall back to decoding line by line.
+    Files that look binary (a NUL byte near the start) are skipped.
+    """
+    hits: List[Tuple[int, str]] = []
+    with open(file_path, "rb") as fh:
+        if b"\x00" in fh.read(_BINARY_SNIFF_BYTES):
+            return hits
+        if not query.isascii():
+            fh.seek(0)
+            text = io.TextIOWrapper(fh, encoding="utf-8", errors="ignore")
+            for line_number, line in enumerate(text, start=1):
+                if query in line.lower():
+                    hits.append((line_number, line.strip()))
+            return hits
+        try:
+            mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped.
+            return hits
+        with mm:
+            pattern = _query_pattern(query)
+            size = len(mm)
+            line_number = 1
+            counted_to = 0
+            pos = 0
+            while pos < size and (match := pattern.search(mm, pos)):
+                start = match.start()
+                line_start = mm.rfind(b"\n", 0, start) + 1
+                line_end = mm.find(b"\n", start)
+                if line_end == -1:
+                    line_end = size
+                line_number += mm[counted_to:line_start].count(b"\n")
+                counted_to = line_start
+                hits.append((line_number, mm[line_start:line_end].decode("utf-8", errors="ignore").strip()))
+                pos = line_end + 1
+    return hits
+
+
+_SEARCH_CONCURRENCY = min(32, (os.cpu_count() or 1) * 4)
+
+
+# Files with these extensions are never opened during a search (they can still match by file
+# name); anything else is sniffed for NUL bytes by _search_file.
+SEARCH_BINARY_EXTENSIONS = frozenset(
+    {
+        ".png", ".jpg", ".jpeg", ".gif", ".bmp", ".ico", ".webp", ".pdf", ".zip", ".gz", ".tgz",
+        ".bz2", ".xz", ".7z", ".rar", ".jar", ".whl", ".exe", ".dll", ".so", ".dylib", ".o", ".a",
+        ".lib", ".pyc", ".class", ".bin", ".dat", ".db", ".sqlite", ".woff", ".woff2", ".ttf",
+        ".otf", ".mp3", ".mp4", ".wav", ".mov", ".avi",
+    }
+)
+SEARCH_MAX_FILE_SIZE = 4 * 1024 * 1024
+SEARCH_SKIP_DIRS = frozenset({".git", "node_modules", "dist", "build", "__pycache__", ".venv"})
+
+
+def _walk_files(base_dir: Path) -> List[Tuple[str, bool]]:
+    """Return ``(path, scan_content)`` for every file under *base_dir* outside skipped directories."""
+    files: List[Tuple[str, bool]] = []
+    pending = [str(base_dir)]
+    while pending:
+        directory = pending.pop()
+        try:
+            with os.scandir(directory) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        subdirs = []
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in SEARCH_SKIP_DIRS:
+                        subdirs.append(entry.path)
+                    continue
+                if not entry.is_file():
+                    continue
+                scan_content = (
+                    os.path.splitext(entry.name)[1].lower() not in SEARCH_BINARY_EXTENSIONS
+                    and entry.stat().st_size <= SEARCH_MAX_FILE_SIZE
+                )
+            except OSError:
+                continue
+            files.append((entry.path, scan_content))
+        pending.extend(reversed(subdirs))
+    return files
+
+
+def _scan_one(
+    file_path: str,
+    query: str,
+    scan_content: bool = True,
+    hits: Optional[List[Tuple[int, str]]] = None,
+) -> List[Dict[str, Any]]:
+    """Match *file_path* by name and by content; pass *hits* when the content was already searched."""
+    relative = os.path.relpath(file_path, _WORKSPACE_REAL).replace(os.sep, "/")
+    matches: List[Dict[str, Any]] = []
+    filename = os.path.basename(file_path)
+    if query in filename.lower():
+        matches.append({"path": relative, "line": 0, "context": filename})
+    if hits is None:
+        if not scan_content:
+            return matches
+        try:
+            hits = _search_file(file_path, query)
+        except Exception:
+            return matches
+    for line_number, context in hits:
+        matches.append({"path": relative, "line": line_number, "context": context})
+    return matches
+
+
+# ripgrep searches file contents far faster than the Python scanner; it is optional.
+RG_EXECUTABLE = shutil.which("rg")
+
+
+def _rg_command(base_dir: Path, query: str, limit: Optional[int] = None) -> List[str]:
+    command = [
+        RG_EXECUTABLE or "rg",
+        "--json",
+        "--ignore-case",
+        "--fixed-strings",
+        # Search what the Python walker would: ignore files and hidden entries are not special.
+        "--no-ignore",
+        "--hidden",
+        "--no-messages",
+        f"--max-filesize={SEARCH_MAX_FILE_SIZE}",
+    ]
+    if limit is not None:
+        # The first *limit* matches in walk order never need more than *limit* hits from one file.
+        command.append(f"--max-count={limit}")
+    for name in sorted(SEARCH_SKIP_DIRS):
+        command += ["--glob", f"!{name}/"]
+    for extension in sorted(SEARCH_BINARY_EXTENSIONS):
+        command += ["--iglob", f"!*{extension}"]
+    command += ["--", query, str(base_dir)]
+    return command
+
+
+def _parse_rg_output(output: bytes) -> Dict[str, List[Tuple[int, str]]]:
+    hits: Dict[str, List[Tuple[int, str]]] = {}
+    for raw in output.splitlines():
+        if b'"type":"match"' not in raw:
+            continue
+        try:
+            data = orjson.loads(raw)["data"]
+            path = data["path"].get("text")
+            lines = data["lines"]
+            text = lines.get("text")
+            if text is None:
+                text = base64.b64decode(lines["bytes"]).decode("utf-8", errors="ignore")
+            line_number = data["line_number"]
+        except (orjson.JSONDecodeError, KeyError, TypeError, ValueError):
+            continue
+        if path is None:
+            continue
+        hits.setdefault(os.path.normpath(path), []).append((line_number, text.strip()))
+    return hits
+
+
+async def _rg_content_hits(
+    base_dir: Path, query: str, limit: Optional[int] = None
+) -> Optional[Dict[str, List[Tuple[int, str]]]]:
+    """Content hits keyed by normalised path, or ``None`` when ripgrep could not be used."""
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *_rg_command(base_dir, query, limit),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+    except OSError:
+        return None
+    try:
+        stdout_bytes, _ = await process.communicate()
+    finally:
+        # Do not leave ripgrep running when the request is cancelled.
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+    # Exit code 1 means "no matches"; anything else is an error, and whatever it printed may be
+    # incomplete, so let the Python scanner do the search instead.
+    if process.returncode not in (0, 1):
+        return None
+    return await asyncio.to_thread(_parse_rg_output, stdout_bytes)
+
+
+async def _run_search(base_dir: Path, query: str, limit: Optional[int] = None) -> Dict[str, Any]:
+    """Search names and contents under *base_dir*; *limit* keeps only the first matches in walk order."""
+    files = await asyncio.to_thread(_walk_files, base_dir)
+    if RG_EXECUTABLE:
+        content_hits = await _rg_content_hits(base_dir, query, limit)
+        if content_hits is not None:
+            matches: List[Dict[str, Any]] = []
+            for file_path, _ in files:
+                if limit is not None and len(matches) >= limit:
+                    break
+                hits = content_hits.get(os.path.normpath(file_path), [])
+                matches.extend(_scan_one(file_path, query, hits=hits))
+            return {"matches": matches[:limit]}
+    results: List[Optional[List[Dict[str, Any]]]] = [None] * len(files)
+    # A fixed pool of workers pulls from one shared index iterator, which bounds open files
+    # without creating a task per file. Scans run on the default thread pool.
+    indices = iter(range(len(files)))
+    # Files [0, ready) are all scanned and hold `found` matches; once that prefix alone
+    # satisfies the limit, no further files need to be opened.
+    ready = 0
+    found = 0
+
+    async def _worker() -> None:
+        nonlocal ready, found
+        for index in indices:
+            if limit is not None and found >= limit:
+                break
+            file_path, scan_content = files[index]
+            if scan_content:
+                results[index] = await asyncio.to_thread(_scan_one, file_path, query)
+            else:
+                results[index] = _scan_one(file_path, query, scan_content=False)
+            while ready < len(results) and results[ready] is not None:
+                found += len(results[ready])
+                ready += 1
+
+    await asyncio.gather(*(_worker() for _ in range(min(_SEARCH_CONCURRENCY, len(files)))))
+    matches = [match for file_matches in results if file_matches for match in file_matches]
+    return {"matches": matches[:limit]}
+
+
+async def _refresh_search(
+    key: Tuple[str, str, Optional[int]], base_dir: Path, query: str, limit: Optional[int]
+) -> None:
+    generation = _SEARCH_GENERATION
+    try:
+        result = await _run_search(base_dir, query, limit)
+        _store_search(key, generation, result)
+    except Exception:
+        pass
+    finally:
+        _SEARCH_REFRESHING.discard(key)
+
+
+_BACKGROUND_TASKS: Set["asyncio.Task[Any]"] = set()
+
+
+def _spawn(coro: Any) -> "asyncio.Task[Any]":
+    # Keep a reference so fire-and-forget tasks are not garbage-collected mid-flight.
+    task = asyncio.create_task(coro)
+    _BACKGROUND_TASKS.add(task)
+    task.add_done_callback(_BACKGROUND_TASKS.discard)
+    return task
+
+
 @app.post("/fs/search")
 async def fs_search(payload: Dict[str, Any]) -> Dict[str, Any]:
     query = (payload.get("query") or "").lower()
     scope = payload.get("path", "")
+    limit = payload.get("limit")
+    if not isinstance(limit, int) or limit <= 0:
+        limit = None
     if not query:
         return {"matches": []}
 
@@ -530,31 +1423,22 @@ async def fs_search(payload: Dict[str, Any]) -> Dict[str, Any]:
     if not base_dir.exists():
         return {"matches": []}
 
-    matches: List[Dict[str, Any]] = []
-    for root_dir, _, files in os.walk(base_dir):
-        for filename in files:
-            file_path = Path(root_dir) / filename
-            relative = file_path.relative_to(WORKSPACE_ROOT).as_posix()
-            if query in filename.lower():
-                matches.append({"path": relative, "line": 0, "context": filename})
-            try:
-                with file_path.open("r", encoding="utf-8", errors="ignore") as fh:
-                    for line_number, line in enumerate(fh, start=1):
-                        if query in line.lower():
-                            matches.append(
-                                {
-                                    "path": relative,
-                                    "line": line_number,
-                                    "context": line.strip(),
-                                }
-                            )
-            except Exception:
-                continue
-    return {"matches": matches}
+    key = (str(base_dir), query, limit)
+    cached = _cache_get(_SEARCH_CACHE, key)
+    if cached is not None:
+        if time.monotonic() - cached[0] > SEARCH_CACHE_TTL and key not in _SEARCH_REFRESHING:
+            _SEARCH_REFRESHING.add(key)
+            _spawn(_refresh_search(key, base_dir, query, limit))
+        return cached[1]
+
+    generation = _SEARCH_GENERATION
+    result = await _run_search(base_dir, query, limit)
+    _store_search(key, generation, result)
+    return result
 
 
 async def _run_command(command: str, cwd: Path, timeout: float) -> Dict[str, Any]:
-    started = datetime.utcnow()
+    started = time.perf_counter()
     process = await asyncio.create_subprocess_shell(
         command,
         cwd=str(cwd),
@@ -568,7 +1452,7 @@ async def _run_command(command: str, cwd: Path, timeout: float) -> Dict[str, Any
         await process.communicate()
         raise HTTPException(status_code=504, detail="Command timed out") from exc
 
-    duration = (datetime.utcnow() - started).total_seconds()
+    duration = time.perf_counter() - started
     stdout_text = stdout_bytes.decode("utf-8", errors="replace")
     stderr_text = stderr_bytes.decode("utf-8", errors="replace")
     max_output = 1_000_000
@@ -602,8 +1486,11 @@ async def terminal_run(payload: Dict[str, Any]) -> Dict[str, Any]:
     if not working_dir.exists():
         raise HTTPException(status_code=400, detail="Working directory does not exist")
 
-    result = await _run_command(command, working_dir, timeout)
-    return result
+    try:
+        return await _run_command(command, working_dir, timeout)
+    finally:
+        # Commands can touch anything in the workspace.
+        _invalidate_fs_caches(Path(_WORKSPACE_REAL))
 
 
 @app.post("/integration/open_vscode")
@@ -636,6 +1523,14 @@ async def open_vscode(payload: Optional[Dict[str, Any]] = None) -> Dict[str, Any
     return {"ok": True, "executable": executable}
 
 
+def _remove_failed_clone(destination: Path) -> None:
+    if destination.exists():
+        if destination.is_dir():
+            shutil.rmtree(destination, ignore_errors=True)
+        else:
+            destination.unlink(missing_ok=True)
+
+
 @app.post("/git/clone")
 async def git_clone(payload: Dict[str, Any]) -> Dict[str, Any]:
     url = (payload.get("url") or "").strip()
@@ -650,7 +1545,7 @@ async def git_clone(payload: Dict[str, Any]) -> Dict[str, Any]:
     if destination.exists():
         raise HTTPException(status_code=400, detail="Destination already exists")
 
-    destination.parent.mkdir(parents=True, exist_ok=True)
+    await asyncio.to_thread(destination.parent.mkdir, parents=True, exist_ok=True)
 
     process = await asyncio.create_subprocess_exec(
         "git",
@@ -665,13 +1560,11 @@ async def git_clone(payload: Dict[str, Any]) -> Dict[str, Any]:
     stderr_text = stderr_bytes.decode("utf-8", errors="replace")
 
     if process.returncode != 0:
-        if destination.exists():
-            if destination.is_dir():
-                shutil.rmtree(destination, ignore_errors=True)
-            else:
-                destination.unlink(missing_ok=True)
+        await asyncio.to_thread(_remove_failed_clone, destination)
         raise HTTPException(status_code=400, detail=f"Git clone failed: {stderr_text or stdout_text}")
 
+    _invalidate_fs_caches(destination)
+
     return {
         "ok": True,
         "path": destination.relative_to(WORKSPACE_ROOT).as_posix(),
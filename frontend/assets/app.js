@@ -825,6 +825,7 @@ async function refreshModels(force = false) {
     const url = new URL(window.location.origin + '/models');
     url.searchParams.set('backend', backend);
     if (baseUrl) url.searchParams.set('base_url', baseUrl);
+    if (force) url.searchParams.set('refresh', '1');
     const res = await api(url.pathname + url.search);
     const models = res.models || [];
     state.modelCache[backend] = models;
@@ -915,10 +916,8 @@ async function testBackendConnection() {
     const latency = typeof res.latency_seconds === 'number' ? res.latency_seconds.toFixed(2) : 'n/a';
     const preview = (res.models_preview || []).join(', ');
     const extra = preview ? ` Example models: ${preview}` : '';
-    setSettingsStatus(
-      `Connected to ${formatBackendName(backend)} in ${latency}s • ${res.model_count || 0} models.${extra}`,
-      false,
-    );
+    const count = typeof res.model_count === 'number' ? ` • ${res.model_count} models.` : '.';
+    setSettingsStatus(`Connected to ${formatBackendName(backend)} in ${latency}s${count}${extra}`, false);
   } catch (err) {
     setSettingsStatus(`Connection failed: ${err.message}`, true);
   }
@@ -979,9 +978,11 @@ async function refreshTree(path) {
 
 async function loadFile(path) {
   const res = await api(`/fs/read?path=${encodeURIComponent(path)}`);
-  state.currentPath = res.path;
-  $('#currentPath').textContent = res.path;
-  $('#editor').value = res.content;
+  // Large files are streamed back as plain text rather than wrapped in JSON.
+  const file = typeof res === 'string' ? { path, content: res } : res;
+  state.currentPath = file.path;
+  $('#currentPath').textContent = file.path;
+  $('#editor').value = file.content;
   $('#editor').focus();
   syncTerminalCwd();
 }
@@ -1019,7 +1020,8 @@ async function globalSearch() {
   const res = await api('/fs/search', {
     method: 'POST',
     headers: { 'Content-Type': 'application/json' },
-    body: JSON.stringify({ query }),
+    // Only the first hit is opened, so let the backend stop scanning once it has one.
+    body: JSON.stringify({ query, limit: 1 }),
   });
   const matches = res.matches || [];
   if (!matches.length) {
@@ -1373,14 +1375,17 @@ async function streamChat(payload, handlers) {
 function processSseChunk(chunk, handlers, safeEnd) {
   const lines = chunk.split('\n');
   let event = 'message';
-  let data = '';
+  const dataLines = [];
   for (const line of lines) {
     if (line.startsWith('event:')) {
       event = line.slice(6).trim();
     } else if (line.startsWith('data:')) {
-      data += line.slice(5).trim();
+      // Per the SSE spec only one leading space is framing; the rest belongs to the token.
+      const value = line.slice(5);
+      dataLines.push(value.startsWith(' ') ? value.slice(1) : value);
     }
   }
+  const data = dataLines.join('\n');
   if (event === 'delta') {
     handlers.delta?.(data);
   } else if (event === 'error') {